@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional, Tuple, Dict, Any
 from datetime import datetime, timedelta
@@ -254,7 +255,8 @@ async def search_properties_post(
         record_search(request.zona, request.dormitorios or "0", request.banos or "0",
                       request.price_min, request.price_max, request.palabras_clave or "")
 
-        properties_all = run_search(
+        properties_all = await run_in_threadpool(
+            run_search,
             zona=request.zona,
             dormitorios=request.dormitorios or "0",
             banos=request.banos or "0",
@@ -299,7 +301,8 @@ async def search_properties_get(
 
         record_search(zona, dormitorios, banos, price_min, price_max, palabras_clave)
 
-        properties_all = run_search(
+        properties_all = await run_in_threadpool(
+            run_search,
             zona=zona,
             dormitorios=dormitorios,
             banos=banos,
@@ -371,7 +374,8 @@ async def home_feed():
     sections = []
     for q in base_queries:
         try:
-            items = run_search(
+            items = await run_in_threadpool(
+                run_search,
                 zona=q["zona"],
                 dormitorios=q["dormitorios"],
                 banos=q["banos"],
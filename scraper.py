@@ -1,12 +1,18 @@
+import os
 import re
 import time
 import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
 import pandas as pd
 from typing import Optional
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
 import logging
 import uuid
 from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -15,29 +21,82 @@ logger = logging.getLogger(__name__)
 COMMON_UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
              "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36")
 
+# Sesión compartida: reutiliza conexiones (keep-alive) entre scrapers y llamadas
+def _build_session():
+    """
+    Crea la sesión HTTP. Con SCRAPER_CACHE=1 usa requests-cache (cache en disco,
+    pensado para desarrollo); en producción las peticiones siempre van en vivo.
+    """
+    session = None
+    if os.getenv("SCRAPER_CACHE") == "1":
+        try:
+            from requests_cache import CachedSession
+            session = CachedSession("scraper_cache.sqlite", expire_after=3600, allowable_methods=["GET"])
+            logger.info("Cache HTTP activado (scraper_cache.sqlite)")
+        except ImportError:
+            logger.warning("SCRAPER_CACHE=1 pero requests-cache no está instalado; se usa sesión sin cache")
+    if session is None:
+        session = requests.Session()
+    session.headers.update({"User-Agent": COMMON_UA})
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+_SESSION = _build_session()
+
+# Patrones compilados una sola vez (se usan dentro de los loops por anuncio)
+_RE_DORM = re.compile(r'(\d+)\s*dormitori', re.I)
+_RE_BANOS = re.compile(r'(\d+)\s*bañ', re.I)
+_RE_M2 = re.compile(r'(\d{1,4})\s*(m²|m2)', re.I)
+_RE_DORM_DOOMOS = re.compile(r'(\d+)\s*dormitorio')
+_RE_BANOS_DOOMOS = re.compile(r'(\d+)\s*baño')
+_RE_M2_DOOMOS = re.compile(r'(\d+)\s*m2')
+_RE_WS = re.compile(r'\s+')
+_RE_SLUG_INVALID = re.compile(r'[^a-z0-9\-]')
+_RE_INT = re.compile(r'(\d+)')
+
+# Tabla de borrado para bytes.translate: todo lo que no sea un dígito ASCII
+_NON_DIGITS = bytes(b for b in range(256) if not 0x30 <= b <= 0x39)
+
 # -------------------- Helpers --------------------
-def get_page_content(url, headers=None, timeout=15):
+def get_page_html(url, headers=None, timeout=15):
     """
-    Obtiene el contenido HTML de una URL usando requests.
+    Obtiene el HTML crudo de una URL usando la sesión compartida.
     """
-    if headers is None:
-        headers = {"User-Agent": COMMON_UA}
     try:
-        response = requests.get(url, headers=headers, timeout=timeout)
+        response = _SESSION.get(url, headers=headers, timeout=timeout)
         response.raise_for_status()
-        return BeautifulSoup(response.text, "html.parser")
+        return response.text
     except Exception as e:
         logger.warning(f"Error al obtener {url}: {e}")
         return None
 
+def make_soup(html, parse_only=None):
+    """
+    Parsea el HTML con lxml. Con parse_only (SoupStrainer) solo se construyen
+    los subárboles que interesan al scraper.
+    """
+    return BeautifulSoup(html, "lxml", parse_only=parse_only)
+
+def get_page_content(url, headers=None, timeout=15, parse_only=None):
+    """
+    Obtiene el contenido HTML de una URL usando requests.
+    """
+    html = get_page_html(url, headers=headers, timeout=timeout)
+    if html is None:
+        return None
+    return make_soup(html, parse_only=parse_only)
+
+@lru_cache(maxsize=256)
 def slugify_zone(zona: str) -> str:
     if not zona:
         return ""
     s = zona.lower().strip()
     trans = str.maketrans("áéíóúñü", "aeiounu")
     s = s.translate(trans)
-    s = re.sub(r"\s+", "-", s)
-    s = re.sub(r"[^a-z0-9\-]", "", s)
+    s = _RE_WS.sub("-", s)
+    s = _RE_SLUG_INVALID.sub("", s)
     return s
 
 def parse_precio_con_moneda(precio_str):
@@ -45,29 +104,125 @@ def parse_precio_con_moneda(precio_str):
         return (None, None)
     s = str(precio_str)
     moneda = None
-    if "S/" in s or s.strip().startswith("S/"):
+    if "S/" in s:
         moneda = "S"
     elif "$" in s:
         moneda = "USD"
-    nums = re.sub(r"[^\d]", "", s)
+    nums = s.encode("ascii", "ignore").translate(None, _NON_DIGITS)
     return (moneda, int(nums)) if nums else (moneda, None)
 
+_MONEDA_NINGUNA, _MONEDA_SOLES, _MONEDA_USD = 0, 1, 2
+_MONEDA_CODIGOS = {"S": _MONEDA_SOLES, "USD": _MONEDA_USD}
+_PRECIO_TOPE = np.iinfo(np.int64).max
+
+def _price_mask(monedas, precios, price_min, price_max):
+    """
+    Máscara vectorizada del filtro de precio por anuncio: descarta soles fuera
+    de rango y dólares cuando hay algún límite. precios usa -1 para "sin precio".
+    """
+    soles_con_precio = (monedas == _MONEDA_SOLES) & (precios >= 0)
+    descartar = np.zeros(len(precios), dtype=bool)
+    if price_max is not None:
+        descartar |= soles_con_precio & (precios > price_max)
+    if price_min is not None:
+        descartar |= soles_con_precio & (precios < price_min)
+    if price_min is not None or price_max is not None:
+        descartar |= monedas == _MONEDA_USD
+    return ~descartar
+
 def _extract_int_from_text(s):
     if s is None:
         return None
-    text = str(s).strip()
-    text = re.sub(r'\s+', ' ', text)
-    m = re.search(r'(\d+)', text)
+    m = _RE_INT.search(str(s))
     return int(m.group(1)) if m else None
 
 # -------------------- Nestoria --------------------
 EXCEPCIONES = ["miraflores", "tarapoto", "la molina", "magdalena", "lambayeque", "ventanilla", "la victoria"]
+_EXCEPCIONES_LOWER = frozenset(e.lower() for e in EXCEPCIONES)
+
+def _cls(name):
+    """Predicado XPath equivalente al selector CSS '.name'."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# XPaths compilados una sola vez; se evalúan en C sobre el árbol de lxml
+_NESTORIA_ITEMS_LISTING = etree.XPath("//ul[@id='main__listing_res']/li")
+_NESTORIA_ITEMS_WITH_PRICE = etree.XPath(f"//li[.//*[{_cls('result__details__price')}]]")
+_NESTORIA_ITEMS_GENERIC = etree.XPath(
+    "//*[self::li or self::div or self::article]"
+    "[contains(@class, 'listing') or contains(@class, 'result') or contains(@class, 'property') or contains(@class, 'item')]"
+)
+_NESTORIA_LINK = etree.XPath(f".//a[{_cls('results__link')}]")
+_NESTORIA_ANY_LINK = etree.XPath(".//a[@href]")
+_NESTORIA_TITLE = etree.XPath(f".//*[{_cls('listing__title__text')}]")
+_NESTORIA_TITLE_ALT = etree.XPath(f".//*[{_cls('listing__title')}]")
+_NESTORIA_PRICE = etree.XPath(f".//*[{_cls('result__details__price')}]//span")
+_NESTORIA_PRICE_ALT = etree.XPath(f".//*[{_cls('result__details__price')}]")
+_NESTORIA_PRICE_GENERIC = etree.XPath(f".//*[{_cls('price')}]")
+_NESTORIA_DESC = etree.XPath(f".//*[{_cls('listing__description')}]")
+_NESTORIA_SUMMARY = etree.XPath(f".//*[{_cls('result__summary')}]")
+_NESTORIA_IMG = etree.XPath(".//img")
+_TEXT_NODES = etree.XPath(".//text()[not(parent::script) and not(parent::style)]")
+
+def _first(el, *xpaths):
+    """Primer nodo encontrado probando los XPaths en orden (como select_one con 'or')."""
+    for xp in xpaths:
+        found = xp(el)
+        if found:
+            return found[0]
+    return None
+
+def _node_text(el):
+    """Equivalente a get_text(" ", strip=True) de BeautifulSoup."""
+    return " ".join(t for t in (t.strip() for t in _TEXT_NODES(el)) if t)
+
+def _is_rating_new(el):
+    return "rating__new" in (el.get("class") or "").split()
+
+def _iter_nestoria_items(html, chunk_size=64 * 1024):
+    """
+    Genera los <li class="rating__new"> a medida que el parser incremental los
+    cierra y los libera después de procesarlos, sin mantener todo el DOM.
+    Si la página no tiene ese marcado, usa los selectores alternativos sobre
+    el árbol completo.
+    """
+    parser = etree.HTMLPullParser(events=("end",), tag="li")
+    found = False
+    root = None
+    try:
+        # None marca el final: se cierra el parser y se procesan los últimos eventos
+        for start in [*range(0, len(html), chunk_size), None]:
+            if start is None:
+                root = parser.close()
+            else:
+                parser.feed(html[start:start + chunk_size])
+            for _, elem in parser.read_events():
+                if not _is_rating_new(elem):
+                    continue
+                found = True
+                yield elem
+                elem.clear(keep_tail=True)
+                parent = elem.getparent()
+                while parent is not None and elem.getprevious() is not None:
+                    del parent[0]
+    except etree.LxmlError as e:
+        logger.warning(f"Error parseando HTML de Nestoria: {e}")
+        return
+
+    if found or root is None:
+        return
+    items = _NESTORIA_ITEMS_LISTING(root)
+    if not items:
+        items = _NESTORIA_ITEMS_WITH_PRICE(root)
+    if not items:
+        items = _NESTORIA_ITEMS_GENERIC(root)
+    yield from items
 
+@lru_cache(maxsize=256)
 def build_zona_slug_nestoria(zona_input: str) -> str:
     if not zona_input or not zona_input.strip():
         return "lima"
     z = zona_input.strip().lower().replace(" ", "-")
-    if z not in [e.lower() for e in EXCEPCIONES]:
+    if z not in _EXCEPCIONES_LOWER:
         return z
     else:
         return "lima_" + z
@@ -90,111 +245,126 @@ def scrape_nestoria(zona: str = "", dormitorios: str = "0", banos: str = "0",
         base_url += "?" + "&".join(params)
     logger.info(f"URL de Nestoria: {base_url}")
 
-    soup = get_page_content(base_url)
-    if not soup:
+    html = get_page_html(base_url)
+    if not html:
         return pd.DataFrame()
 
-    results = []
-    items = soup.select("li.rating__new") or soup.select("ul#main__listing_res > li")
-    if not items:
-        items = [li for li in soup.find_all("li") if li.select_one(".result__details__price")]
-    if not items:
-        items = soup.find_all(["li", "div", "article"], class_=lambda x: x and any(cls in x for cls in ["listing", "result", "property", "item"]))
-
-    seen_links = set()
-    for i, li in enumerate(items):
+    titulos = []
+    precios = []
+    m2s = []
+    dormitorios_list = []
+    banos_list = []
+    descripciones = []
+    links = []
+    imagenes = []
+    monedas = []
+    valores = []
+    for li in _iter_nestoria_items(html):
         try:
-            a_tag = li.select_one("a.results__link") or li.select_one("a[href]")
-            if not a_tag:
+            a_tag = _first(li, _NESTORIA_LINK, _NESTORIA_ANY_LINK)
+            if a_tag is None:
                 continue
             link = a_tag.get("data-href") or a_tag.get("href") or ""
             if link and link.startswith("/"):
                 link = "https://www.nestoria.pe" + link
-            if not link or link in seen_links:
+            if not link:
                 continue
 
-            title_elem = li.select_one(".listing__title__text") or li.select_one(".listing__title") or a_tag
-            title = title_elem.get_text(" ", strip=True) if title_elem else a_tag.get_text(" ", strip=True)[:140]
-
-            price_elem = li.select_one(".result__details__price span") or li.select_one(".result__details__price") or li.select_one(".price")
-            price_text = price_elem.get_text(" ", strip=True) if price_elem else ""
+            title_elem = _first(li, _NESTORIA_TITLE, _NESTORIA_TITLE_ALT)
+            title = _node_text(title_elem) if title_elem is not None else _node_text(a_tag)
 
+            price_elem = _first(li, _NESTORIA_PRICE, _NESTORIA_PRICE_ALT, _NESTORIA_PRICE_GENERIC)
+            price_text = _node_text(price_elem) if price_elem is not None else ""
             moneda, precio_val = parse_precio_con_moneda(price_text)
-            if price_max is not None and moneda == "S" and precio_val is not None and precio_val > price_max:
-                continue
-            if price_min is not None and moneda == "S" and precio_val is not None and precio_val < price_min:
-                continue
-            if moneda == "USD" and (price_max is not None or price_min is not None):
-                continue
 
-            desc_elem = li.select_one(".listing__description") or li.select_one(".result__summary") or None
-            desc = desc_elem.get_text(" ", strip=True) if desc_elem else li.get_text(" ", strip=True)[:800]
+            full_text = _node_text(li)
+            desc_elem = _first(li, _NESTORIA_DESC, _NESTORIA_SUMMARY)
+            desc = _node_text(desc_elem) if desc_elem is not None else full_text[:800]
 
-            text_content = li.get_text(" ", strip=True).lower()
+            text_content = full_text.lower()
             dormitorios_text = ""
-            dorm_match = re.search(r'(\d+)\s*dormitori', text_content, flags=re.I)
+            dorm_match = _RE_DORM.search(text_content)
             if dorm_match:
                 dormitorios_text = dorm_match.group(1)
             banos_text = ""
-            banos_match = re.search(r'(\d+)\s*bañ', text_content, flags=re.I)
+            banos_match = _RE_BANOS.search(text_content)
             if banos_match:
                 banos_text = banos_match.group(1)
             m2_text = ""
-            m2_match = re.search(r'(\d{1,4})\s*(m²|m2)', text_content, flags=re.I)
+            m2_match = _RE_M2.search(text_content)
             if m2_match:
                 m2_text = m2_match.group(1)
 
             img_url = ""
-            img_tag = li.select_one("img")
-            if img_tag:
+            img_tag = _first(li, _NESTORIA_IMG)
+            if img_tag is not None:
                 img_url = img_tag.get("src") or img_tag.get("data-src") or ""
                 if img_url and img_url.startswith("//"):
                     img_url = "https:" + img_url
                 img_url = img_url.strip()
-
-            results.append({
-                "titulo": title,
-                "precio": price_text,
-                "m2": m2_text,
-                "dormitorios": dormitorios_text,
-                "baños": banos_text,
-                "descripcion": desc,
-                "link": link,
-                "imagen_url": img_url
-            })
-            seen_links.add(link)
         except Exception as e:
             logger.warning(f"Error procesando anuncio en Nestoria: {e}")
             continue
 
-    logger.info(f"Procesados {len(results)} anuncios válidos de Nestoria")
-    return pd.DataFrame(results)
+        titulos.append(title)
+        precios.append(price_text)
+        m2s.append(m2_text)
+        dormitorios_list.append(dormitorios_text)
+        banos_list.append(banos_text)
+        descripciones.append(desc)
+        links.append(link)
+        imagenes.append(img_url)
+        monedas.append(_MONEDA_CODIGOS.get(moneda, _MONEDA_NINGUNA))
+        valores.append(-1 if precio_val is None else min(precio_val, _PRECIO_TOPE))
+
+    # Filtro de precio en bloque y dedup por link (primera aparición que pasa el filtro)
+    keep = _price_mask(np.array(monedas, dtype=np.int8), np.array(valores, dtype=np.int64), price_min, price_max)
+    seen_links = set()
+    for i, link in enumerate(links):
+        if keep[i]:
+            if link in seen_links:
+                keep[i] = False
+            else:
+                seen_links.add(link)
+
+    df = pd.DataFrame({
+        "titulo": titulos,
+        "precio": precios,
+        "m2": m2s,
+        "dormitorios": dormitorios_list,
+        "baños": banos_list,
+        "descripcion": descripciones,
+        "link": links,
+        "imagen_url": imagenes,
+    }).loc[keep].reset_index(drop=True)
+    logger.info(f"Procesados {len(df)} anuncios válidos de Nestoria")
+    return df
 
 # -------------------- Infocasas --------------------
+ZONA_MAPEO_INFOCASAS = {
+    "ancón": "ancon", "ate": "ate", "barranco": "barranco", "breña": "breña",
+    "carabayllo": "carabayllo", "chaclacayo": "chaclacayo", "chorrillos": "chorrillos",
+    "cieneguilla": "cieneguilla", "comas": "comas", "el agustino": "el-agustino",
+    "independencia": "independencia", "jesús maría": "jesus-maria", "la molina": "la-molina",
+    "la victoria": "la-victoria", "lima": "lima-cercado", "lince": "lince",
+    "los olivos": "los-olivos", "lurigancho": "lurigancho", "lurín": "lurin",
+    "magdalena del mar": "magdalena-del-mar", "miraflores": "miraflores",
+    "pachacámac": "pachacamac", "pucusana": "pucusana", "pueblo libre": "pueblo-libre",
+    "puente piedra": "puente-piedra", "punta hermosa": "punta-hermosa",
+    "punta negra": "punta-negra", "rímac": "rimac", "san bartolo": "san-bartolo",
+    "san borja": "san-borja", "san isidro": "san-isidro",
+    "san juan de lurigancho": "san-juan-de-lurigancho",
+    "san juan de miraflores": "san-juan-de-miraflores", "san luis": "san-luis",
+    "san martín de porres": "san-martin-de-porres", "san miguel": "san-miguel",
+    "santa anita": "santa-anita", "santa maría del mar": "santa-maria-del-mar",
+    "santa rosa": "santa-rosa", "santiago de surco": "santiago-de-surco",
+    "surquillo": "surquillo", "villa el salvador": "villa-el-salvador",
+    "villa maría del triunfo": "villa-maria-del-triunfo"
+}
+
 def scrape_infocasas(zona: str = "", dormitorios: str = "0", banos: str = "0",
                      price_min: Optional[int] = None, price_max: Optional[int] = None,
                      palabras_clave: str = "", max_scrolls: int = 8):
-    ZONA_MAPEO_INFOCASAS = {
-        "ancón": "ancon", "ate": "ate", "barranco": "barranco", "breña": "breña",
-        "carabayllo": "carabayllo", "chaclacayo": "chaclacayo", "chorrillos": "chorrillos",
-        "cieneguilla": "cieneguilla", "comas": "comas", "el agustino": "el-agustino",
-        "independencia": "independencia", "jesús maría": "jesus-maria", "la molina": "la-molina",
-        "la victoria": "la-victoria", "lima": "lima-cercado", "lince": "lince",
-        "los olivos": "los-olivos", "lurigancho": "lurigancho", "lurín": "lurin",
-        "magdalena del mar": "magdalena-del-mar", "miraflores": "miraflores",
-        "pachacámac": "pachacamac", "pucusana": "pucusana", "pueblo libre": "pueblo-libre",
-        "puente piedra": "puente-piedra", "punta hermosa": "punta-hermosa",
-        "punta negra": "punta-negra", "rímac": "rimac", "san bartolo": "san-bartolo",
-        "san borja": "san-borja", "san isidro": "san-isidro",
-        "san juan de lurigancho": "san-juan-de-lurigancho",
-        "san juan de miraflores": "san-juan-de-miraflores", "san luis": "san-luis",
-        "san martín de porres": "san-martin-de-porres", "san miguel": "san-miguel",
-        "santa anita": "santa-anita", "santa maría del mar": "santa-maria-del-mar",
-        "santa rosa": "santa-rosa", "santiago de surco": "santiago-de-surco",
-        "surquillo": "surquillo", "villa el salvador": "villa-el-salvador",
-        "villa maría del triunfo": "villa-maria-del-triunfo"
-    }
-
     if zona and zona.strip():
         zona_lower = zona.strip().lower()
         zone_slug = ZONA_MAPEO_INFOCASAS.get(zona_lower, slugify_zone(zona))
@@ -218,12 +388,23 @@ def scrape_infocasas(zona: str = "", dormitorios: str = "0", banos: str = "0",
             base += f"?searchstring={requests.utils.quote(palabras_clave.strip())}"
 
     logger.info(f"URL de InfoCasas: {base}")
-    soup = get_page_content(base)
-    if not soup:
+    html = get_page_html(base)
+    if not html:
         return pd.DataFrame()
 
-    results = []
-    nodes = soup.select("div.listingCard") or soup.select("article")
+    titulos = []
+    precios = []
+    m2s = []
+    dormitorios_list = []
+    banos_list = []
+    descripciones = []
+    links = []
+    imagenes = []
+    soup = make_soup(html, parse_only=SoupStrainer("div", class_="listingCard"))
+    nodes = soup.select("div.listingCard")
+    if not nodes:
+        soup = make_soup(html)
+        nodes = soup.select("div.listingCard") or soup.select("article")
     for n in nodes:
         try:
             a = n.select_one("a[href]")
@@ -246,15 +427,15 @@ def scrape_infocasas(zona: str = "", dormitorios: str = "0", banos: str = "0",
             for item in typology_items:
                 text = item.get_text().strip()
                 if "Dorm" in text:
-                    dorm_match = re.search(r'(\d+)', text)
+                    dorm_match = _RE_INT.search(text)
                     if dorm_match:
                         dormitorios_text = dorm_match.group(1)
                 elif "Baños" in text or "Baño" in text:
-                    banos_match = re.search(r'(\d+)', text)
+                    banos_match = _RE_INT.search(text)
                     if banos_match:
                         banos_text = banos_match.group(1)
                 elif "m²" in text:
-                    m2_match = re.search(r'(\d+)', text)
+                    m2_match = _RE_INT.search(text)
                     if m2_match:
                         m2_text = m2_match.group(1)
 
@@ -269,48 +450,55 @@ def scrape_infocasas(zona: str = "", dormitorios: str = "0", banos: str = "0",
                     img_url = "https:" + img_url
                 img_url = img_url.strip()
 
-            results.append({
-                "titulo": title,
-                "precio": price,
-                "m2": m2_text,
-                "dormitorios": dormitorios_text,
-                "baños": banos_text,
-                "descripcion": desc,
-                "link": href or "",
-                "imagen_url": img_url
-            })
+            titulos.append(title)
+            precios.append(price)
+            m2s.append(m2_text)
+            dormitorios_list.append(dormitorios_text)
+            banos_list.append(banos_text)
+            descripciones.append(desc)
+            links.append(href or "")
+            imagenes.append(img_url)
         except Exception as e:
             logger.warning(f"Error procesando anuncio en InfoCasas: {e}")
             continue
 
-    return pd.DataFrame(results)
+    return pd.DataFrame({
+        "titulo": titulos,
+        "precio": precios,
+        "m2": m2s,
+        "dormitorios": dormitorios_list,
+        "baños": banos_list,
+        "descripcion": descripciones,
+        "link": links,
+        "imagen_url": imagenes,
+    })
 
 
 # -------------------- Properati --------------------
+ZONA_MAPEO_PROPERATI = {
+    "ancón": "ancon", "ate": "ate", "barranco": "barranco", "breña": "brena",
+    "carabayllo": "carabayllo", "chaclacayo": "chaclacayo", "chorrillos": "chorrillos",
+    "cieneguilla": "cieneguilla", "comas": "comas", "el agustino": "el-agustino",
+    "independencia": "independencia", "jesús maría": "jesus-maria", "la molina": "la-molina",
+    "la victoria": "la-victoria", "lima": "lima", "lince": "lince",
+    "los olivos": "los-olivos", "lurigancho": "lurigancho", "lurín": "lurin",
+    "magdalena del mar": "magdalena-del-mar", "miraflores": "miraflores",
+    "pachacámac": "pachacamac", "pucusana": "pucusana", "pueblo libre": "pueblo-libre",
+    "puente piedra": "puente-piedra", "punta hermosa": "punta-hermosa",
+    "punta negra": "punta-negra", "rímac": "rimac", "san bartolo": "san-bartolo",
+    "san borja": "san-borja", "san isidro": "san-isidro",
+    "san juan de lurigancho": "san-juan-de-lurigancho",
+    "san juan de miraflores": "san-juan-de-miraflores", "san luis": "san-luis",
+    "san martín de porres": "san-martin-de-porres", "san miguel": "san-miguel",
+    "santa anita": "santa-anita", "santa maría del mar": "santa-maria-del-mar",
+    "santa rosa": "santa-rosa", "santiago de surco": "santiago-de-surco",
+    "surquillo": "surquillo", "villa el salvador": "villa-el-salvador",
+    "villa maría del triunfo": "villa-maria-del-triunfo"
+}
+
 def scrape_properati(zona: str = "", dormitorios: str = "0", banos: str = "0",
                      price_min: Optional[int] = None, price_max: Optional[int] = None,
                      palabras_clave: str = ""):
-    ZONA_MAPEO_PROPERATI = {
-        "ancón": "ancon", "ate": "ate", "barranco": "barranco", "breña": "brena",
-        "carabayllo": "carabayllo", "chaclacayo": "chaclacayo", "chorrillos": "chorrillos",
-        "cieneguilla": "cieneguilla", "comas": "comas", "el agustino": "el-agustino",
-        "independencia": "independencia", "jesús maría": "jesus-maria", "la molina": "la-molina",
-        "la victoria": "la-victoria", "lima": "lima", "lince": "lince",
-        "los olivos": "los-olivos", "lurigancho": "lurigancho", "lurín": "lurin",
-        "magdalena del mar": "magdalena-del-mar", "miraflores": "miraflores",
-        "pachacámac": "pachacamac", "pucusana": "pucusana", "pueblo libre": "pueblo-libre",
-        "puente piedra": "puente-piedra", "punta hermosa": "punta-hermosa",
-        "punta negra": "punta-negra", "rímac": "rimac", "san bartolo": "san-bartolo",
-        "san borja": "san-borja", "san isidro": "san-isidro",
-        "san juan de lurigancho": "san-juan-de-lurigancho",
-        "san juan de miraflores": "san-juan-de-miraflores", "san luis": "san-luis",
-        "san martín de porres": "san-martin-de-porres", "san miguel": "san-miguel",
-        "santa anita": "santa-anita", "santa maría del mar": "santa-maria-del-mar",
-        "santa rosa": "santa-rosa", "santiago de surco": "santiago-de-surco",
-        "surquillo": "surquillo", "villa el salvador": "villa-el-salvador",
-        "villa maría del triunfo": "villa-maria-del-triunfo"
-    }
-
     if zona and zona.strip():
         zona_lower = zona.strip().lower()
         zone_slug = ZONA_MAPEO_PROPERATI.get(zona_lower, slugify_zone(zona))
@@ -348,16 +536,24 @@ def scrape_properati(zona: str = "", dormitorios: str = "0", banos: str = "0",
         base += "&" + "&".join(params)
 
     logger.info(f"URL de Properati: {base}")
-    try:
-        r = requests.get(base, headers={"User-Agent": COMMON_UA}, timeout=15)
-        r.raise_for_status()
-    except Exception as e:
-        logger.error(f"Error en Properati al hacer la petición: {e}")
+    html = get_page_html(base)
+    if not html:
+        logger.error(f"Error en Properati al hacer la petición: {base}")
         return pd.DataFrame()
 
-    soup = BeautifulSoup(r.text, "html.parser")
-    cards = soup.select("article") or soup.select("div.posting-card") or soup.select("a[href]")
-    results = []
+    soup = make_soup(html, parse_only=SoupStrainer("article"))
+    cards = soup.select("article")
+    if not cards:
+        soup = make_soup(html)
+        cards = soup.select("article") or soup.select("div.posting-card") or soup.select("a[href]")
+    titulos = []
+    precios = []
+    m2s = []
+    dormitorios_list = []
+    banos_list = []
+    descripciones = []
+    links = []
+    imagenes = []
     for c in cards:
         try:
             a = c.select_one("a[href]") or c.select_one("a.title")
@@ -373,7 +569,7 @@ def scrape_properati(zona: str = "", dormitorios: str = "0", banos: str = "0",
             dorm_elem = c.select_one(".properties__bedrooms")
             if dorm_elem:
                 dorm_text = dorm_elem.get_text(" ", strip=True)
-                dorm_match = re.search(r'(\d+)', dorm_text)
+                dorm_match = _RE_INT.search(dorm_text)
                 if dorm_match:
                     dormitorios_text = dorm_match.group(1)
 
@@ -381,7 +577,7 @@ def scrape_properati(zona: str = "", dormitorios: str = "0", banos: str = "0",
             banos_elem = c.select_one(".properties__bathrooms")
             if banos_elem:
                 banos_text_full = banos_elem.get_text(" ", strip=True)
-                banos_match = re.search(r'(\d+)', banos_text_full)
+                banos_match = _RE_INT.search(banos_text_full)
                 if banos_match:
                     banos_text = banos_match.group(1)
 
@@ -389,7 +585,7 @@ def scrape_properati(zona: str = "", dormitorios: str = "0", banos: str = "0",
             m2_elem = c.select_one(".properties__area")
             if m2_elem:
                 m2_text_full = m2_elem.get_text(" ", strip=True)
-                m2_match = re.search(r'(\d+)', m2_text_full)
+                m2_match = _RE_INT.search(m2_text_full)
                 if m2_match:
                     m2_text = m2_match.group(1)
 
@@ -408,40 +604,47 @@ def scrape_properati(zona: str = "", dormitorios: str = "0", banos: str = "0",
                 else:
                     img = ""
 
-            results.append({
-                "titulo": title,
-                "precio": price,
-                "m2": m2_text,
-                "dormitorios": dormitorios_text,
-                "baños": banos_text,
-                "descripcion": title,
-                "link": href or "",
-                "imagen_url": img
-            })
+            titulos.append(title)
+            precios.append(price)
+            m2s.append(m2_text)
+            dormitorios_list.append(dormitorios_text)
+            banos_list.append(banos_text)
+            descripciones.append(title)
+            links.append(href or "")
+            imagenes.append(img)
         except Exception as e:
             logger.warning(f"Error en Properati al procesar un anuncio: {e}")
             continue
 
-    return pd.DataFrame(results)
+    return pd.DataFrame({
+        "titulo": titulos,
+        "precio": precios,
+        "m2": m2s,
+        "dormitorios": dormitorios_list,
+        "baños": banos_list,
+        "descripcion": descripciones,
+        "link": links,
+        "imagen_url": imagenes,
+    })
 
 # -------------------- Doomos --------------------
+ZONA_IDS_CORRECTOS = {
+    "ancón": "-336912", "ate": "-337679", "breña": "65645345", "carabayllo": "-339907",
+    "chaclacayo": "-341190", "chorrillos": "-342811", "cieneguilla": "-343329",
+    "comas": "-343903", "el agustino": "-345552", "jesús maría": "348294",
+    "la molina": "-351740", "la victoria": "-352442", "lima": "45343445",
+    "lince": "-352696", "los olivos": "191126", "lurigancho": "-353648",
+    "lurín": "-353652", "magdalena del mar": "326245", "miraflores": "-354864",
+    "pachacámac": "-356636", "pucusana": "-359672", "pueblo libre": "-359690",
+    "puente piedra": "-359759", "punta hermosa": "-360186", "punta negra": "-360189",
+    "rímac": "-361308", "san bartolo": "-362154", "san borja": "-362170",
+    "san isidro": "-362425", "san luis": "-362738", "san miguel": "-362804",
+    "santiago de surco": "-364705", "surquillo": "-364723"
+}
+
 def scrape_doomos(zona: str = "", dormitorios: str = "0", banos: str = "0",
                   price_min: Optional[int] = None, price_max: Optional[int] = None,
                   palabras_clave: str = ""):
-    ZONA_IDS_CORRECTOS = {
-        "ancón": "-336912", "ate": "-337679", "breña": "65645345", "carabayllo": "-339907",
-        "chaclacayo": "-341190", "chorrillos": "-342811", "cieneguilla": "-343329",
-        "comas": "-343903", "el agustino": "-345552", "jesús maría": "348294",
-        "la molina": "-351740", "la victoria": "-352442", "lima": "45343445",
-        "lince": "-352696", "los olivos": "191126", "lurigancho": "-353648",
-        "lurín": "-353652", "magdalena del mar": "326245", "miraflores": "-354864",
-        "pachacámac": "-356636", "pucusana": "-359672", "pueblo libre": "-359690",
-        "puente piedra": "-359759", "punta hermosa": "-360186", "punta negra": "-360189",
-        "rímac": "-361308", "san bartolo": "-362154", "san borja": "-362170",
-        "san isidro": "-362425", "san luis": "-362738", "san miguel": "-362804",
-        "santiago de surco": "-364705", "surquillo": "-364723"
-    }
-
     base_url = "http://www.doomos.com.pe/search/"
     params = {
         "clase": "1",
@@ -475,11 +678,18 @@ def scrape_doomos(zona: str = "", dormitorios: str = "0", banos: str = "0",
     url = base_url + "?" + "&".join(f"{k}={requests.utils.quote(str(v))}" for k,v in params.items())
     logger.info(f"URL de Doomos: {url}")
 
-    soup = get_page_content(url)
+    soup = get_page_content(url, parse_only=SoupStrainer(class_="content_result"))
     if not soup:
         return pd.DataFrame()
 
-    results = []
+    titulos = []
+    precios = []
+    m2s = []
+    dormitorios_list = []
+    banos_list = []
+    descripciones = []
+    links = []
+    imagenes = []
     cards = soup.select(".content_result")
     if not cards:
         logger.warning("No se encontraron cards en Doomos")
@@ -498,20 +708,21 @@ def scrape_doomos(zona: str = "", dormitorios: str = "0", banos: str = "0",
             price_elem = card.select_one(".content_result_precio")
             price = price_elem.get_text(" ", strip=True) if price_elem else ""
 
+            full_text = card.get_text(" ", strip=True)
             desc_elem = card.select_one(".content_result_descripcion")
-            desc = desc_elem.get_text(" ", strip=True) if desc_elem else card.get_text(" ", strip=True)[:400]
+            desc = desc_elem.get_text(" ", strip=True) if desc_elem else full_text[:400]
 
-            text_content = card.get_text(" ", strip=True).lower()
+            text_content = full_text.lower()
             dormitorios_text = ""
             banos_text = ""
             m2_text = ""
-            dorm_match = re.search(r'(\d+)\s*dormitorio', text_content)
+            dorm_match = _RE_DORM_DOOMOS.search(text_content)
             if dorm_match:
                 dormitorios_text = dorm_match.group(1)
-            banos_match = re.search(r'(\d+)\s*baño', text_content)
+            banos_match = _RE_BANOS_DOOMOS.search(text_content)
             if banos_match:
                 banos_text = banos_match.group(1)
-            m2_match = re.search(r'(\d+)\s*m2', text_content)
+            m2_match = _RE_M2_DOOMOS.search(text_content)
             if m2_match:
                 m2_text = m2_match.group(1)
 
@@ -523,21 +734,28 @@ def scrape_doomos(zona: str = "", dormitorios: str = "0", banos: str = "0",
                     img_url = "https:" + img_url
                 img_url = img_url.strip()
 
-            results.append({
-                "titulo": title,
-                "precio": price,
-                "m2": m2_text,
-                "dormitorios": dormitorios_text,
-                "baños": banos_text,
-                "descripcion": desc,
-                "link": href,
-                "imagen_url": img_url
-            })
+            titulos.append(title)
+            precios.append(price)
+            m2s.append(m2_text)
+            dormitorios_list.append(dormitorios_text)
+            banos_list.append(banos_text)
+            descripciones.append(desc)
+            links.append(href)
+            imagenes.append(img_url)
         except Exception as e:
             logger.warning(f"Error procesando card en Doomos: {e}")
             continue
 
-    return pd.DataFrame(results)
+    return pd.DataFrame({
+        "titulo": titulos,
+        "precio": precios,
+        "m2": m2s,
+        "dormitorios": dormitorios_list,
+        "baños": banos_list,
+        "descripcion": descripciones,
+        "link": links,
+        "imagen_url": imagenes,
+    })
 
 # -------------------- Filtrado y Unificación --------------------
 SCRAPERS = [
@@ -547,108 +765,133 @@ SCRAPERS = [
     ("doomos", scrape_doomos),
 ]
 
-def _parse_price_soles(s):
-    moneda, val = parse_precio_con_moneda(str(s))
-    return val if moneda == "S" else None
+REQUIRED_COLUMNS = ["titulo","precio","m2","dormitorios","baños","descripcion","link","imagen_url"]
+OUTPUT_COLUMNS = REQUIRED_COLUMNS + ["fuente","scraped_at","id"]
 
 def _filter_df_strict(df, dormitorios_req, banos_req, price_min, price_max):
     if df is None or df.empty:
         return pd.DataFrame()
-    dfc = df.copy().reset_index(drop=True)
-    dfc["_precio_soles"] = dfc["precio"].apply(_parse_price_soles)
-    dfc["_dorm_num"] = dfc["dormitorios"].apply(_extract_int_from_text)
-    dfc["_banos_num"] = dfc["baños"].apply(_extract_int_from_text)
-    mask = pd.Series(True, index=dfc.index)
+    mask = pd.Series(True, index=df.index)
 
     if dormitorios_req and str(dormitorios_req).strip() != "" and str(dormitorios_req) != "0":
         try:
             dorm_req_int = int(dormitorios_req)
-            mask &= (dfc["_dorm_num"].notnull()) & (dfc["_dorm_num"] == dorm_req_int)
+            dorm_num = pd.to_numeric(df["dormitorios"].astype("string[pyarrow]").str.extract(r"(\d+)", expand=False), errors="coerce").astype("Int64")
+            mask &= (dorm_num.notnull()) & (dorm_num == dorm_req_int)
         except:
             pass
 
     if banos_req and str(banos_req).strip() != "" and str(banos_req) != "0":
         try:
             banos_req_int = int(banos_req)
-            mask &= (dfc["_banos_num"].notnull()) & (dfc["_banos_num"] == banos_req_int)
+            banos_num = pd.to_numeric(df["baños"].astype("string[pyarrow]").str.extract(r"(\d+)", expand=False), errors="coerce").astype("Int64")
+            mask &= (banos_num.notnull()) & (banos_num == banos_req_int)
         except:
             pass
 
     if (price_min is not None) or (price_max is not None):
         pmin = price_min if price_min is not None else -10**12
         pmax = price_max if price_max is not None else 10**12
-        mask &= dfc["_precio_soles"].notnull()
-        mask &= (dfc["_precio_soles"] >= int(pmin)) & (dfc["_precio_soles"] <= int(pmax))
+        precio = df["precio"].astype("string[pyarrow]")
+        es_soles = precio.str.contains("S/", regex=False)
+        precio_soles = pd.to_numeric(precio.str.replace(r"[^\d]", "", regex=True), errors="coerce").where(es_soles)
+        mask &= precio_soles.notnull()
+        mask &= (precio_soles >= int(pmin)) & (precio_soles <= int(pmax))
 
-    df_filtered = dfc.loc[mask].copy().reset_index(drop=True)
-    df_filtered.drop(columns=["_precio_soles","_dorm_num","_banos_num"], errors="ignore", inplace=True)
-    return df_filtered
+    # Las columnas auxiliares nunca se agregan a df: solo se copia la selección final
+    return df.loc[mask].reset_index(drop=True)
 
 def _filter_by_keywords(df, palabras_clave: str):
     if df is None or df.empty or not palabras_clave or not palabras_clave.strip():
         return df
     palabras = palabras_clave.lower().split()
-    dfc = df.copy()
-    dfc["texto_completo"] = (
-        dfc["titulo"].astype(str) + " " +
-        dfc.get("descripcion", pd.Series([""]*len(dfc))).astype(str) + " " +
-        dfc.get("m2", pd.Series([""]*len(dfc))).astype(str) + " " +
-        dfc.get("dormitorios", pd.Series([""]*len(dfc))).astype(str) + " " +
-        dfc.get("baños", pd.Series([""]*len(dfc))).astype(str)
+    vacio = pd.Series([""]*len(df), index=df.index)
+    texto_completo = (
+        df["titulo"].astype("string[pyarrow]") + " " +
+        df.get("descripcion", vacio).astype("string[pyarrow]") + " " +
+        df.get("m2", vacio).astype("string[pyarrow]") + " " +
+        df.get("dormitorios", vacio).astype("string[pyarrow]") + " " +
+        df.get("baños", vacio).astype("string[pyarrow]")
     ).str.lower()
+    # Búsqueda literal por palabra (RE2 de Arrow no admite lookaheads); se
+    # combinan las máscaras y el DataFrame se indexa una sola vez
+    mask = pd.Series(True, index=df.index)
     for p in palabras:
-        dfc = dfc[dfc["texto_completo"].str.contains(re.escape(p), na=False, case=False)]
-    dfc.drop(columns=["texto_completo"], errors="ignore", inplace=True)
-    return dfc
+        mask &= texto_completo.str.contains(p, regex=False).fillna(False)
+    return df.loc[mask].reset_index(drop=True)
+
+def _batch_uuid4(n):
+    """Genera n UUID4 con una sola lectura de os.urandom."""
+    raw = os.urandom(16 * n)
+    return [str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * n, 16)]
 
 def run_scrapers(zona: str = "", dormitorios: str = "0", banos: str = "0",
                  price_min: Optional[int] = None, price_max: Optional[int] = None,
                  palabras_clave: str = ""):
-    frames = []
     logger.info(f"🔎 Buscando: zona='{zona}' | dorms={dormitorios} | baños={banos} | pmin={price_min} | pmax={price_max} | keywords='{palabras_clave}'")
-    for name, func in SCRAPERS:
-        logger.info(f"-> Ejecutando scraper: {name}")
-        try:
-            df = func(zona=zona, dormitorios=dormitorios, banos=banos, price_min=price_min, price_max=price_max, palabras_clave=palabras_clave)
-        except Exception as e:
-            logger.error(f" ❌ Error CRÍTICO ejecutando {name}: {e}")
-            df = pd.DataFrame()
-
-        if df is None or not isinstance(df, pd.DataFrame):
-            df = pd.DataFrame(columns=["titulo","precio","m2","dormitorios","baños","descripcion","link","imagen_url"])
-
-        required_columns = ["titulo","precio","m2","dormitorios","baños","descripcion","link","imagen_url"]
-        for col in required_columns:
-            if col not in df.columns:
-                df[col] = ""
-
-        df = df.fillna("").astype(object)
-        for col in required_columns:
-            df[col] = df[col].astype(str).str.strip().replace({None: "", "None": ""})
-
-        df_filtered = _filter_df_strict(df, dormitorios, banos, price_min, price_max)
-        logger.info(f"   después filtrado estricto: {len(df_filtered)}")
-
-        if palabras_clave and palabras_clave.strip() and name not in ("urbania", "doomos", "properati"):
-            prev = len(df_filtered)
-            df_filtered = _filter_by_keywords(df_filtered, palabras_clave)
-            logger.info(f"   después filtrar por keywords: {len(df_filtered)}")
-
-        if len(df_filtered) > 0:
-            df_filtered = df_filtered.copy()
-            df_filtered["fuente"] = name
-            df_filtered["scraped_at"] = datetime.now().isoformat()
-            df_filtered["id"] = [str(uuid.uuid4()) for _ in range(len(df_filtered))]
-            frames.append(df_filtered)
+    filtered = {}
+    with ThreadPoolExecutor(max_workers=len(SCRAPERS)) as ex:
+        futures = {}
+        for name, func in SCRAPERS:
+            logger.info(f"-> Ejecutando scraper: {name}")
+            fut = ex.submit(func, zona=zona, dormitorios=dormitorios, banos=banos, price_min=price_min, price_max=price_max, palabras_clave=palabras_clave)
+            futures[fut] = name
+
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                df = fut.result()
+            except Exception as e:
+                logger.error(f" ❌ Error CRÍTICO ejecutando {name}: {e}")
+                df = pd.DataFrame()
+
+            if df is None or not isinstance(df, pd.DataFrame):
+                df = pd.DataFrame(columns=REQUIRED_COLUMNS)
+
+            for col in REQUIRED_COLUMNS:
+                if col not in df.columns:
+                    df[col] = ""
+
+            # Texto en buffers Arrow: menos memoria y operaciones .str en C++
+            df[REQUIRED_COLUMNS] = (
+                df[REQUIRED_COLUMNS].fillna("").astype("string[pyarrow]")
+                .apply(lambda col: col.str.strip())
+                .replace("None", "")
+            )
+
+            df_filtered = _filter_df_strict(df, dormitorios, banos, price_min, price_max)
+            logger.info(f"   [{name}] después filtrado estricto: {len(df_filtered)}")
+
+            if palabras_clave and palabras_clave.strip() and name not in ("urbania", "doomos", "properati"):
+                prev = len(df_filtered)
+                df_filtered = _filter_by_keywords(df_filtered, palabras_clave)
+                logger.info(f"   [{name}] después filtrar por keywords: {len(df_filtered)}")
+
+            if len(df_filtered) > 0:
+                df_filtered["fuente"] = name
+                df_filtered["scraped_at"] = datetime.now().isoformat()
+                df_filtered["id"] = _batch_uuid4(len(df_filtered))
+                filtered[name] = df_filtered
+
+    # Mantener el orden de SCRAPERS para que el dedup "keep first" sea determinista
+    frames = [filtered[name] for name, _ in SCRAPERS if name in filtered]
 
     if not frames:
         logger.warning("⚠️ Ninguna fuente devolvió anuncios tras filtrar.")
         return pd.DataFrame()
 
-    combined = pd.concat(frames, ignore_index=True, sort=False)
-    combined = combined[~combined["link"].str.startswith("#")].reset_index(drop=True)
-    combined = combined[combined["link"] != ""].reset_index(drop=True)
-    combined = combined.drop_duplicates(subset=["link","titulo"], keep="first").reset_index(drop=True)
+    # Dedup por (link, titulo) directamente sobre las filas de cada fuente:
+    # se conserva la primera aparición sin materializar el concat completo
+    i_link = OUTPUT_COLUMNS.index("link")
+    i_titulo = OUTPUT_COLUMNS.index("titulo")
+    seen = {}
+    for df_filtered in frames:
+        for row in zip(*(df_filtered[col] for col in OUTPUT_COLUMNS)):
+            link = row[i_link]
+            if not link or link.startswith("#"):
+                continue
+            seen.setdefault((link, row[i_titulo]), row)
+    combined = pd.DataFrame(list(seen.values()), columns=OUTPUT_COLUMNS)
     logger.info(f"✅ Total final de propiedades combinadas: {len(combined)}")
     return combined
 